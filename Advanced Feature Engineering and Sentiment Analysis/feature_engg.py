@@ -1,58 +1,155 @@
+import argparse
+import os
+import sys
+from functools import partial
+
 import pandas as pd
 import numpy as np
 
-# Load your longitudinal dataset
-df = pd.read_csv('merged_football_dataset.csv')
+# The validation and out-of-core helpers live next to the cleaning scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Data Cleaning and Preprocessing'))
+from out_of_core import (ROW_ORDER, check_same_outputs, combine_partitions, partition_csv, partition_paths,
+                         read_partition, run_partitions)
+from validation import combine_reports, format_report, validate
+
+INPUT_FILE = 'merged_football_dataset.csv'
+OUTPUT_FILE = 'final_modeling_features.csv'
+INPUT_QUARANTINE_FILE = 'merged_quarantine.csv'
+FEATURE_QUARANTINE_FILE = 'final_modeling_quarantine.csv'
+PARTITION_DIR = 'feature_partitions'
+
+# Extract only the relevant features for the final modeling dataset
+final_cols = [
+    'player_name', 'season_year', 'age', 'position',
+    'market_value_eur', 'market_value_yoy_change', 'market_value_yoy_pct_change',
+    'minutes_played_season', 'goal_involvement_per_90', 'defensive_actions_per_90', 'sb_pass_accuracy',
+    'season_days_injured', 'injury_risk_score', 'availability_index',
+    'fan_sentiment', 'media_sentiment', 'overall_sentiment', 'sentiment_yoy_change'
+]
+
 
 # --- FEATURE ENGINEERING FOR MODELING ---
 
-# 1. Target Variables (What the model might predict)
-# Year-Over-Year Change in Market Value
-df['market_value_yoy_change'] = df.groupby('player_name')['market_value_eur'].diff().fillna(0)
+def engineer_features(df):
+    # 1. Target Variables (What the model might predict)
+    # Year-Over-Year Change in Market Value
+    df['market_value_yoy_change'] = df.groupby('player_name')['market_value_eur'].diff().fillna(0)
 
-# Percentage Change in Market Value (with epsilon to prevent division by zero)
-epsilon = 1e-5
-df['market_value_yoy_pct_change'] = (
-    df['market_value_yoy_change'] / 
-    (df['market_value_eur'] - df['market_value_yoy_change'] + epsilon)
-).fillna(0).clip(lower=-1.0, upper=5.0) # Clip extreme percentages for stability
+    # Percentage Change in Market Value (with epsilon to prevent division by zero)
+    epsilon = 1e-5
+    df['market_value_yoy_pct_change'] = (
+        df['market_value_yoy_change'] /
+        (df['market_value_eur'] - df['market_value_yoy_change'] + epsilon)
+    ).fillna(0).clip(lower=-1.0, upper=5.0) # Clip extreme percentages for stability
 
-# 2. Performance Metrics (Standardized to per 90 minutes)
-# Attacking Metric: Goal Involvement per 90 mins
-df['goal_involvement_per_90'] = (
-    (df['goals_total'] + df['assists_total']) / (df['minutes_played_season'] / 90)
-).fillna(0)
+    # 2. Performance Metrics (Standardized to per 90 minutes)
+    # Attacking Metric: Goal Involvement per 90 mins
+    df['goal_involvement_per_90'] = (
+        (df['goals_total'] + df['assists_total']) / (df['minutes_played_season'] / 90)
+    ).fillna(0)
 
-# Replace 'inf' values that happen if a player played 0 minutes
-df.replace([np.inf, -np.inf], 0, inplace=True)
+    # Replace 'inf' values that happen if a player played 0 minutes
+    df.replace([np.inf, -np.inf], 0, inplace=True)
 
-# Defensive Metric: Defensive Actions per 90 mins
-df['defensive_actions_per_90'] = (
-    (df['sb_tackles'] + df['sb_interceptions']) / (df['minutes_played_season'] / 90)
-).fillna(0)
+    # Defensive Metric: Defensive Actions per 90 mins
+    df['defensive_actions_per_90'] = (
+        (df['sb_tackles'] + df['sb_interceptions']) / (df['minutes_played_season'] / 90)
+    ).fillna(0)
 
-# 3. Injury & Availability Metrics
-# Availability Index: 0 to 1 scale (1 means available 100% of the year)
-df['availability_index'] = (1 - (df['season_days_injured'] / 365)).clip(0, 1)
+    # 3. Injury & Availability Metrics
+    # Availability Index: 0 to 1 scale (1 means available 100% of the year)
+    df['availability_index'] = (1 - (df['season_days_injured'] / 365)).clip(0, 1)
 
-# 4. Sentiment Metrics
-# Composite Sentiment Score (Average of Fan and Media)
-df['overall_sentiment'] = (df['fan_sentiment'] + df['media_sentiment']) / 2
+    # 4. Sentiment Metrics
+    # Composite Sentiment Score (Average of Fan and Media)
+    df['overall_sentiment'] = (df['fan_sentiment'] + df['media_sentiment']) / 2
 
-# Sentiment Trend (Is the player's reputation currently improving or worsening?)
-df['sentiment_yoy_change'] = df.groupby('player_name')['overall_sentiment'].diff().fillna(0)
+    # Sentiment Trend (Is the player's reputation currently improving or worsening?)
+    df['sentiment_yoy_change'] = df.groupby('player_name')['overall_sentiment'].diff().fillna(0)
+
+    # --- FINAL SELECTION ---
+    return df[final_cols + ([ROW_ORDER] if ROW_ORDER in df.columns else [])]
+
+
+def run_stage(df, input_quarantine, feature_quarantine, print_report=True):
+    # Report input problems (duplicate player seasons, out-of-range values)
+    # without dropping rows, so per-player diffs below still see every season.
+    # ROW_ORDER (out-of-core only) is not checked but keeps quarantine rows in
+    # input order when partitions are combined.
+    _, input_report = validate(df, 'merged_longitudinal',
+                               quarantine_path=input_quarantine, print_report=print_report)
+
+    modeling_df = engineer_features(df)
+
+    # Catch non-finite or out-of-range features (e.g. zero-minute per-90 values)
+    _, feature_report = validate(modeling_df, 'features',
+                                 quarantine_path=feature_quarantine, print_report=print_report)
+
+    return modeling_df, input_report, feature_report
+
+
+# --- OUT-OF-CORE MODE ---
+# Rows are split by a player_name hash: every groupby().diff() above is
+# per player, so each partition can be processed on its own.
+
+def engineer_partition(i, n_partitions):
+    df = read_partition(os.path.join(PARTITION_DIR, 'input'), i, n_partitions)
+
+    modeling_df, input_report, feature_report = run_stage(
+        df,
+        partition_paths(os.path.join(PARTITION_DIR, 'input_quarantine'), n_partitions)[i],
+        partition_paths(os.path.join(PARTITION_DIR, 'feature_quarantine'), n_partitions)[i],
+        print_report=False,
+    )
+
+    modeling_df.to_csv(partition_paths(os.path.join(PARTITION_DIR, 'output'), n_partitions)[i], index=False)
+    return input_report, feature_report
+
+
+def run_out_of_core(n_partitions, workers, chunksize):
+    partition_csv(INPUT_FILE, os.path.join(PARTITION_DIR, 'input'), key='player_name',
+                  n_partitions=n_partitions, chunksize=chunksize, row_order=True)
+    for name in ('output', 'input_quarantine', 'feature_quarantine'):
+        os.makedirs(os.path.join(PARTITION_DIR, name), exist_ok=True)
+
+    reports = run_partitions(partial(engineer_partition, n_partitions=n_partitions), n_partitions, workers)
+    input_reports, feature_reports = zip(*reports)
+    print(format_report(combine_reports(input_reports)))
+    print(format_report(combine_reports(feature_reports)))
+
+    # Save the final engineered features and the quarantined rows
+    combine_partitions(partition_paths(os.path.join(PARTITION_DIR, 'output'), n_partitions), OUTPUT_FILE)
+    combine_partitions(partition_paths(os.path.join(PARTITION_DIR, 'input_quarantine'), n_partitions),
+                       INPUT_QUARANTINE_FILE)
+    combine_partitions(partition_paths(os.path.join(PARTITION_DIR, 'feature_quarantine'), n_partitions),
+                       FEATURE_QUARANTINE_FILE)
+
+
+def run_in_memory():
+    # Load your longitudinal dataset
+    df = pd.read_csv(INPUT_FILE)
+
+    modeling_df, _, _ = run_stage(df, INPUT_QUARANTINE_FILE, FEATURE_QUARANTINE_FILE)
+
+    # Save the final engineered features
+    modeling_df.to_csv(OUTPUT_FILE, index=False)
 
-# --- FINAL SELECTION ---
-# Extract only the relevant features for the final modeling dataset
-final_cols = [
-    'player_name', 'season_year', 'age', 'position', 
-    'market_value_eur', 'market_value_yoy_change', 'market_value_yoy_pct_change', 
-    'minutes_played_season', 'goal_involvement_per_90', 'defensive_actions_per_90', 'sb_pass_accuracy',
-    'season_days_injured', 'injury_risk_score', 'availability_index', 
-    'fan_sentiment', 'media_sentiment', 'overall_sentiment', 'sentiment_yoy_change'
-]
 
-modeling_df = df[final_cols]
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the final modeling features')
+    parser.add_argument('--out-of-core', action='store_true',
+                        help='partition the input by player and process each partition separately')
+    parser.add_argument('--partitions', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunksize', type=int, default=500_000)
+    parser.add_argument('--check', action='store_true',
+                        help='run both modes on the input and compare their outputs (small data only)')
+    args = parser.parse_args()
 
-# Save the final engineered features
-# modeling_df.to_csv('final_modeling_features.csv', index=False)
\ No newline at end of file
+    if args.check:
+        check_same_outputs(run_in_memory, partial(run_out_of_core, args.partitions, args.workers, args.chunksize),
+                           [OUTPUT_FILE, INPUT_QUARANTINE_FILE, FEATURE_QUARANTINE_FILE])
+    elif args.out_of_core:
+        run_out_of_core(args.partitions, args.workers, args.chunksize)
+    else:
+        run_in_memory()
@@ -3,6 +3,8 @@ import json
 import pandas as pd
 from collections import defaultdict
 
+from validation import validate
+
 # =====================
 # SET CORRECT PATHS
 # =====================
@@ -159,6 +161,16 @@ df["pass_accuracy"] = (df["pass_completed"] / df["passes"]).fillna(0)
 
 df = df.sort_values(["player_name", "season"])
 
+# Validate before saving; unmatched match IDs are reported as coverage
+events_with_season = (event_files_processed - len(match_ids_skipped), event_files_processed)
+
+df, report = validate(
+    df,
+    "statsbomb",
+    quarantine_path="statsbomb_quarantine.csv",
+    coverage={"events_with_season": events_with_season},
+)
+
 df.to_csv("statsbomb.csv", index=False)
 
 print("CSV saved successfully!")
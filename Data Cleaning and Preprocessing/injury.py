@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 
+from validation import validate
+
 # ===============================
 # 1. LOAD DATASET
 # ===============================
@@ -84,6 +86,13 @@ model_features = df[[
 # Fill remaining missing values
 model_features = model_features.fillna(0)
 
+# Report only: repeated (p_id2, start_year) keys are distinct records here
+_, report = validate(
+    model_features,
+    "injury",
+    quarantine_path="injuries_quarantine.csv",
+)
+
 # ===============================
 # 6. SAVE FINAL DATASET
 # ===============================
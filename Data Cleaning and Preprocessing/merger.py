@@ -1,125 +1,264 @@
+import argparse
+import os
+from functools import partial
+
 import pandas as pd
 import numpy as np
 
-# ==============================
-# 1. LOAD DATASETS
-# ==============================
+from out_of_core import (
+    ROW_ORDER,
+    check_same_outputs,
+    combine_partitions,
+    partition_csv,
+    partition_paths,
+    read_partition,
+    run_partitions,
+)
+from validation import combine_reports, format_report, join_coverage, validate
 
-per_df = pd.read_csv("statsbomb.csv")          # Performance data
-market_df = pd.read_csv("market_values.csv")      # Transfermarkt scraped data
-injury_df = pd.read_csv("injuries.csv")           # Injury data
-sentiment_df = pd.read_csv("sentiment.csv")       # Sentiment scores
+INPUT_FILES = {
+    "per": "statsbomb.csv",             # Performance data
+    "market": "market_values.csv",      # Transfermarkt scraped data
+    "injury": "injuries.csv",           # Injury data
+    "sentiment": "sentiment.csv",       # Sentiment scores
+}
+OUTPUT_FILE = "final_merged_dataset.csv"
+QUARANTINE_FILE = "final_merged_quarantine.csv"
+PARTITION_DIR = "merger_partitions"
 
 
 # ==============================
-# 2. STANDARDIZE COLUMN NAMES
+# 1. STANDARDIZE COLUMN NAMES
 # ==============================
 
-# Make all player names lowercase for safe merging
-for df in [per_df, market_df, injury_df, sentiment_df]:
+def standardize_names(df):
+    # Make all player names lowercase for safe merging
     if "player_name" in df.columns:
         df["player_name"] = df["player_name"].str.lower().str.strip()
     if "name" in df.columns:
         df["player_name"] = df["name"].str.lower().str.strip()
+    return df
 
 
 # ==============================
-# 3. SELECT IMPORTANT COLUMNS ONLY
+# 2. SELECT IMPORTANT COLUMNS ONLY
 # (Avoid unnecessary columns)
 # ==============================
 
-# StatsBomb performance columns
-per_df = per_df[[
-    "player_name",
-    "age",
-    "overall",
-    "potential",
-    "wage_eur",
-    "value_eur",
-    "club_name",
-    "league_name"
-]]
-
-# Market value columns
-market_df = market_df[[
-    "player_name",
-    "market_value_eur",
-    "contract_until",
-    "release_clause_eur"
-]]
-
-# Injury features (aggregate per player)
-injury_agg = injury_df.groupby("player_name").agg({
-    "total_days_injured": "sum",
-    "season_days_injured": "sum",
-    "injury_count": "sum"
-}).reset_index()
-
-# Sentiment features
-sentiment_df = sentiment_df[[
-    "player_name",
-    "sentiment_score",
-    "positive_mentions",
-    "negative_mentions"
-]]
+def select_columns(per_df, market_df, injury_df, sentiment_df):
+    # StatsBomb performance columns
+    per_df = per_df[[
+        "player_name",
+        "age",
+        "overall",
+        "potential",
+        "wage_eur",
+        "value_eur",
+        "club_name",
+        "league_name"
+    ] + ([ROW_ORDER] if ROW_ORDER in per_df.columns else [])]
+
+    # Market value columns
+    market_df = market_df[[
+        "player_name",
+        "market_value_eur",
+        "contract_until",
+        "release_clause_eur"
+    ]]
+
+    # Injury features (aggregate per player)
+    injury_agg = injury_df.groupby("player_name").agg({
+        "total_days_injured": "sum",
+        "season_days_injured": "sum",
+        "injury_count": "sum"
+    }).reset_index()
+
+    # Sentiment features
+    sentiment_df = sentiment_df[[
+        "player_name",
+        "sentiment_score",
+        "positive_mentions",
+        "negative_mentions"
+    ]]
+
+    return per_df, market_df, injury_agg, sentiment_df
 
 
 # ==============================
-# 4. MERGE DATASETS
+# 3. MERGE, CLEAN & ENGINEER
 # ==============================
 
-# Merge per + Market
-merged_df = pd.merge(per_df, market_df, on="player_name", how="left")
+def merge_sources(per_df, market_df, injury_agg, sentiment_df):
+    # Merge per + Market
+    merged_df = pd.merge(per_df, market_df, on="player_name", how="left")
+
+    # Merge Injury
+    merged_df = pd.merge(merged_df, injury_agg, on="player_name", how="left")
+
+    # Merge Sentiment
+    merged_df = pd.merge(merged_df, sentiment_df, on="player_name", how="left")
+
+    # Handle missing values
+    merged_df.fillna({
+        "total_days_injured": 0,
+        "season_days_injured": 0,
+        "injury_count": 0,
+        "sentiment_score": 0,
+        "positive_mentions": 0,
+        "negative_mentions": 0
+    }, inplace=True)
+
+    # Contract remaining years
+    merged_df["contract_until"] = pd.to_datetime(
+        merged_df["contract_until"], errors="coerce"
+    )
+
+    merged_df["contract_remaining_years"] = (
+        merged_df["contract_until"].dt.year - pd.Timestamp.now().year
+    )
+
+    # Injury risk metric
+    merged_df["injury_risk"] = (
+        merged_df["total_days_injured"] / (merged_df["age"] + 1)
+    )
+
+    # Log transform value (important for ML)
+    merged_df["log_market_value"] = np.log1p(merged_df["market_value_eur"])
 
-# Merge Injury
-merged_df = pd.merge(merged_df, injury_agg, on="player_name", how="left")
+    return merged_df
 
-# Merge Sentiment
-merged_df = pd.merge(merged_df, sentiment_df, on="player_name", how="left")
+
+def run_stage(per_df, market_df, injury_df, sentiment_df, quarantine_path,
+              print_report=True):
+    per_df, market_df, injury_agg, sentiment_df = select_columns(
+        per_df, market_df, injury_df, sentiment_df
+    )
+
+    # Share of performance rows each source can be joined to
+    coverage = {
+        "market_values": join_coverage(per_df, market_df, "player_name"),
+        "injuries": join_coverage(per_df, injury_agg, "player_name"),
+        "sentiment": join_coverage(per_df, sentiment_df, "player_name"),
+    }
+
+    merged_df = merge_sources(per_df, market_df, injury_agg, sentiment_df)
+
+    # Report only: every performance record is kept in the output.
+    # ROW_ORDER (out-of-core only) is not checked but lets the quarantine
+    # partitions be combined in input order.
+    _, report = validate(
+        merged_df,
+        "merged",
+        quarantine_path=quarantine_path,
+        coverage=coverage,
+        print_report=print_report,
+    )
+    return merged_df, report
 
 
 # ==============================
-# 5. HANDLE MISSING VALUES
+# 4. IN-MEMORY MODE
 # ==============================
 
-merged_df.fillna({
-    "total_days_injured": 0,
-    "season_days_injured": 0,
-    "injury_count": 0,
-    "sentiment_score": 0,
-    "positive_mentions": 0,
-    "negative_mentions": 0
-}, inplace=True)
+def run_in_memory():
+    sources = {
+        name: standardize_names(pd.read_csv(path))
+        for name, path in INPUT_FILES.items()
+    }
+
+    merged_df, report = run_stage(
+        sources["per"], sources["market"], sources["injury"], sources["sentiment"],
+        quarantine_path=QUARANTINE_FILE,
+    )
+
+    merged_df.to_csv(OUTPUT_FILE, index=False)
+
+    print("✅ All datasets merged successfully!")
+    print("Final shape:", merged_df.shape)
+    print(merged_df.head())
 
 
 # ==============================
-# 6. FEATURE ENGINEERING
+# 5. OUT-OF-CORE MODE
 # ==============================
 
-# Contract remaining years
-merged_df["contract_until"] = pd.to_datetime(
-    merged_df["contract_until"], errors="coerce"
-)
+def merge_partition(i, n_partitions):
+    # Every source is split by the same player_name hash, so partition i of
+    # each source holds all rows of the same players
+    sources = {
+        name: read_partition(os.path.join(PARTITION_DIR, name), i, n_partitions)
+        for name in INPUT_FILES
+    }
 
-merged_df["contract_remaining_years"] = (
-    merged_df["contract_until"].dt.year - pd.Timestamp.now().year
-)
+    merged_df, report = run_stage(
+        sources["per"], sources["market"], sources["injury"], sources["sentiment"],
+        quarantine_path=partition_paths(os.path.join(PARTITION_DIR, "quarantine"), n_partitions)[i],
+        print_report=False,
+    )
 
-# Injury risk metric
-merged_df["injury_risk"] = (
-    merged_df["total_days_injured"] / (merged_df["age"] + 1)
-)
+    merged_df.to_csv(partition_paths(os.path.join(PARTITION_DIR, "output"), n_partitions)[i], index=False)
+    return report
+
+
+def run_out_of_core(n_partitions, workers, chunksize):
+    for name, path in INPUT_FILES.items():
+        partition_csv(
+            path,
+            os.path.join(PARTITION_DIR, name),
+            key="player_name",
+            n_partitions=n_partitions,
+            prepare=standardize_names,
+            chunksize=chunksize,
+            # The performance table drives the left joins, keep its order
+            row_order=(name == "per"),
+        )
+    os.makedirs(os.path.join(PARTITION_DIR, "output"), exist_ok=True)
+    os.makedirs(os.path.join(PARTITION_DIR, "quarantine"), exist_ok=True)
 
-# Log transform value (important for ML)
-merged_df["log_market_value"] = np.log1p(merged_df["market_value_eur"])
+    reports = run_partitions(
+        partial(merge_partition, n_partitions=n_partitions), n_partitions, workers
+    )
+    print(format_report(combine_reports(reports)))
+
+    combine_partitions(
+        partition_paths(os.path.join(PARTITION_DIR, "output"), n_partitions),
+        OUTPUT_FILE,
+    )
+    combine_partitions(
+        partition_paths(os.path.join(PARTITION_DIR, "quarantine"), n_partitions),
+        QUARANTINE_FILE,
+    )
+
+    print("✅ All datasets merged successfully (out-of-core)!")
+    print("Partitions:", n_partitions)
 
 
 # ==============================
-# 7. SAVE FINAL DATASET
+# 6. RUN
 # ==============================
 
-merged_df.to_csv("final_merged_dataset.csv", index=False)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge all sources into one dataset")
+    parser.add_argument("--out-of-core", action="store_true",
+                        help="partition inputs by player and merge each partition separately")
+    parser.add_argument("--partitions", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=500_000)
+    parser.add_argument("--check", action="store_true",
+                        help="run both modes on the inputs and compare their outputs (small data only)")
+    parser.add_argument("--sentiment", default=INPUT_FILES["sentiment"],
+                        help="sentiment input, e.g. sentiment_weekly.csv from twitter.py streaming")
+    args = parser.parse_args()
+
+    INPUT_FILES["sentiment"] = args.sentiment
 
-print("✅ All datasets merged successfully!")
-print("Final shape:", merged_df.shape)
-print(merged_df.head())
\ No newline at end of file
+    if args.check:
+        check_same_outputs(
+            run_in_memory,
+            partial(run_out_of_core, args.partitions, args.workers, args.chunksize),
+            [OUTPUT_FILE, QUARANTINE_FILE],
+        )
+    elif args.out_of_core:
+        run_out_of_core(args.partitions, args.workers, args.chunksize)
+    else:
+        run_in_memory()
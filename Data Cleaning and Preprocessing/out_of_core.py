@@ -0,0 +1,187 @@
+import csv
+import heapq
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+
+import numpy as np
+import pandas as pd
+
+# ==============================
+# OUT-OF-CORE EXECUTION HELPERS
+# ==============================
+#
+# Used by merger.py and feature_engg.py when their inputs do not fit in
+# memory:
+#
+#   1. partition_csv()      - stream each input CSV in chunks and split it
+#                             into N files by a hash of the player key
+#   2. run_partitions()     - run the stage on every partition in parallel;
+#                             all rows of one player land in one partition,
+#                             so joins and groupby().diff() stay exact
+#   3. combine_partitions() - stream the partition outputs back into one
+#                             CSV in the original row order
+#
+# check_same_outputs() runs both modes on small data and compares the files.
+#
+# Only one chunk per input (while partitioning) or one partition per worker
+# is held in memory at a time.
+
+# Running row number of the driving input, used to restore its order
+ROW_ORDER = "_row_order"
+
+# Column dtypes of the source, saved next to its partitions
+DTYPES_FILE = "dtypes.json"
+
+
+# ==============================
+# 1. HASH PARTITIONING
+# ==============================
+
+def partition_ids(keys, n_partitions):
+    # hash_pandas_object uses a fixed hash key, so ids are stable across
+    # processes and runs
+    hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+    return (hashes % np.uint64(n_partitions)).astype(np.int64)
+
+
+def partition_paths(out_dir, n_partitions):
+    return [os.path.join(out_dir, f"part-{i:04d}.csv") for i in range(n_partitions)]
+
+
+def partition_csv(path, out_dir, key, n_partitions, prepare=None,
+                  chunksize=500_000, row_order=False):
+    """Split the CSV at `path` into `n_partitions` files under `out_dir`.
+
+    `prepare` is applied to every chunk before hashing (e.g. to normalise
+    the key). With row_order=True a ROW_ORDER column is added so
+    combine_partitions() can restore the input order. The source dtypes
+    are saved so read_partition() can restore them.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = partition_paths(out_dir, n_partitions)
+    written = [False] * n_partitions
+    columns = None
+    dtypes = {}
+    offset = 0
+
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        if prepare is not None:
+            chunk = prepare(chunk)
+        if row_order:
+            chunk[ROW_ORDER] = np.arange(offset, offset + len(chunk))
+            offset += len(chunk)
+        columns = chunk.columns
+
+        # A column read as int in one chunk and float in another is float
+        for col, dtype in chunk.dtypes.items():
+            seen = dtypes.get(col)
+            if seen is None or seen == str(dtype):
+                dtypes[col] = str(dtype)
+            elif pd.api.types.is_numeric_dtype(seen) and pd.api.types.is_numeric_dtype(dtype):
+                dtypes[col] = "float64"
+            else:
+                dtypes[col] = "object"
+
+        ids = partition_ids(chunk[key], n_partitions)
+        for i, part in chunk.groupby(ids, sort=False):
+            part.to_csv(paths[i], mode="w" if not written[i] else "a",
+                        header=not written[i], index=False)
+            written[i] = True
+
+    # Empty partitions still get a header so every worker can read its input
+    for i, done in enumerate(written):
+        if not done:
+            pd.DataFrame(columns=columns).to_csv(paths[i], index=False)
+
+    with open(os.path.join(out_dir, DTYPES_FILE), "w", encoding="utf-8") as f:
+        json.dump(dtypes, f)
+
+    return paths
+
+
+def read_partition(out_dir, i, n_partitions):
+    # A partition on its own can infer other dtypes than the full source:
+    # an empty one reads as all-object, a numeric column may hold only
+    # nulls, a text column may hold only digit strings ("007" -> 7).
+    # Restore the source dtypes so every partition behaves the same.
+    with open(os.path.join(out_dir, DTYPES_FILE), encoding="utf-8") as f:
+        dtypes = json.load(f)
+
+    text_dtypes = {
+        col: dtype for col, dtype in dtypes.items()
+        if not pd.api.types.is_numeric_dtype(dtype)
+    }
+    df = pd.read_csv(partition_paths(out_dir, n_partitions)[i], dtype=text_dtypes)
+
+    if df.empty:
+        return df.astype(dtypes)
+
+    for col, dtype in dtypes.items():
+        if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+# ==============================
+# 2. PARALLEL EXECUTION
+# ==============================
+
+def run_partitions(worker, n_partitions, workers=None):
+    # worker(i) must be a module-level function (or functools.partial of
+    # one) so it can be sent to the process pool
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(worker, range(n_partitions)))
+
+
+# ==============================
+# 3. COMBINE RESULTS
+# ==============================
+
+def combine_partitions(paths, out_path, order_col=ROW_ORDER):
+    """Stream partition CSVs into `out_path`.
+
+    Each partition must already be sorted by `order_col`; a k-way merge on
+    that column restores the global order without loading any partition.
+    The order column is dropped from the output.
+    """
+    with ExitStack() as stack:
+        readers = []
+        header = None
+        for path in paths:
+            reader = csv.reader(stack.enter_context(open(path, newline="", encoding="utf-8")))
+            part_header = next(reader, None)
+            if part_header is None:
+                continue
+            header = header or part_header
+            readers.append(reader)
+
+        if header is None:
+            raise ValueError("No partition output to combine")
+
+        order_idx = header.index(order_col)
+        keep = [i for i in range(len(header)) if i != order_idx]
+
+        out = stack.enter_context(open(out_path, "w", newline="", encoding="utf-8"))
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow([header[i] for i in keep])
+        for row in heapq.merge(*readers, key=lambda row: int(row[order_idx])):
+            writer.writerow([row[i] for i in keep])
+
+
+# ==============================
+# 4. EQUALITY CHECK
+# ==============================
+
+def check_same_outputs(run_in_memory, run_out_of_core, paths):
+    # Run both modes on the same (small) inputs and compare every output
+    # file. Values must match; dtypes may differ (e.g. 3 vs 3.0).
+    run_in_memory()
+    expected = {path: pd.read_csv(path) for path in paths}
+
+    run_out_of_core()
+    for path in paths:
+        pd.testing.assert_frame_equal(expected[path], pd.read_csv(path), check_dtype=False)
+
+    print("✅ In-memory and out-of-core outputs are equal:", ", ".join(paths))
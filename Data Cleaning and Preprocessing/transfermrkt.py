@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 
+from validation import validate
+
 # ======================================================
 # 1️⃣ LOAD DATA
 # ======================================================
@@ -157,11 +159,13 @@ data["transfer_fee"] = data["transfer_fee"].fillna(0)
 # 9️⃣ FINAL CLEANING
 # ======================================================
 
-# Remove rows with missing essential values
-data = data.dropna(subset=["market_value_in_eur", "age"])
-
-# Remove unrealistic ages
-data = data[(data["age"] >= 15) & (data["age"] <= 45)]
+# Remove rows with missing essential values, unrealistic ages (15-45)
+# and other rule violations; dropped rows go to the quarantine file
+data, report = validate(
+    data,
+    "transfermarkt",
+    quarantine_path="market_values_quarantine.csv",
+)
 
 # Reset index
 data = data.reset_index(drop=True)
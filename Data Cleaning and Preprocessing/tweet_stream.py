@@ -0,0 +1,417 @@
+import io
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# ==============================
+# STREAMING TWEET INGESTION
+# ==============================
+#
+# Used by `twitter.py --stream-dir ...` / `twitter.py --stream-port ...`.
+#
+# Tweets are read in micro-batches from a source, scored, matched to
+# players and folded into per-player daily buckets. Only the last
+# WINDOW_DAYS days of buckets are kept, so memory is bounded by
+# players x days no matter how long the stream runs.
+#
+# After every batch the daily and weekly aggregates are published as CSV
+# files with the same columns merger.py reads from sentiment.csv.
+#
+# Every tweet needs a non-empty `text` and a parsable `created_at`; records
+# without them are counted as rejected. Windows run on `created_at` only. Dates up to
+# MAX_CLOCK_SKEW after arrival are clamped to the arrival time, later ones
+# are rejected, so a bad date cannot push the watermark ahead.
+#
+# Arrival time (the start of the reported end-to-end latency) is the
+# record's `ingested_at` when present, else the socket receive time or the
+# file's last modification time.
+
+WINDOW_DAYS = 7
+ARRIVED = "_arrived"
+INGESTED = "ingested_at"
+MAX_CLOCK_SKEW = pd.Timedelta(minutes=5)
+
+
+# ==============================
+# 1. SOURCES
+# ==============================
+
+def _complete_records(data, is_csv):
+    # Cut `data` after its last complete line. For CSV a newline inside a
+    # quoted field is not a record end, so the cut must leave an even
+    # number of quote characters before it.
+    end = data.rfind(b"\n")
+    while is_csv and end >= 0 and data.count(b'"', 0, end) % 2:
+        end = data.rfind(b"\n", 0, end)
+    return data[:end + 1]
+
+
+def _line_end(f, offset):
+    # Offset just past the next newline at or after `offset`, None if the
+    # line is not complete yet
+    f.seek(offset)
+    pos = offset
+    while True:
+        block = f.read(65536)
+        if not block:
+            return None
+        i = block.find(b"\n")
+        if i >= 0:
+            return pos + i + 1
+        pos += len(block)
+
+
+def _parse_times(values):
+    # The fast path infers one format from the first value and turns every
+    # other format into NaT; parse those again value by value
+    with warnings.catch_warnings():
+        # "Could not infer format": the per-value fallback below covers it
+        warnings.simplefilter("ignore", UserWarning)
+        parsed = pd.to_datetime(values, utc=True, errors="coerce")
+    retry = parsed.isna() & values.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(values[retry], utc=True, errors="coerce", format="mixed")
+    return parsed
+
+
+class DirectorySource:
+    """Tail every .csv / .jsonl / .ndjson file in a directory."""
+
+    EXTENSIONS = (".csv", ".jsonl", ".ndjson")
+
+    def __init__(self, directory, max_bytes=4_000_000):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.offsets = {}
+        self.headers = {}
+        # path -> offset where no complete record was found on the last poll
+        self.stalled = {}
+        self.rejected = 0
+
+    def poll(self):
+        frames = []
+        for name in sorted(os.listdir(self.directory)):
+            ext = os.path.splitext(name)[1].lower()
+            if ext not in self.EXTENSIONS:
+                continue
+
+            path = os.path.join(self.directory, name)
+            offset = self.offsets.get(path, 0)
+            size = os.path.getsize(path)
+            if size < offset:
+                # File was truncated or replaced: start again
+                offset = 0
+                self.headers.pop(path, None)
+            if size == offset:
+                continue
+
+            with open(path, "rb") as f:
+                f.seek(offset)
+                chunk = f.read(self.max_bytes)
+                data = _complete_records(chunk, ext == ".csv")
+
+                if not data:
+                    # No complete record. A line longer than max_bytes, or a
+                    # CSV line whose stray quote still blocks every cut one
+                    # poll later, is skipped so the file cannot stall. (A
+                    # quoted multi-line record still being written gets one
+                    # poll to finish.)
+                    too_long = b"\n" not in chunk and len(chunk) == self.max_bytes
+                    stuck = b"\n" in chunk and self.stalled.get(path) == offset
+                    if too_long or stuck:
+                        end = _line_end(f, offset)
+                        if end is not None:
+                            self.offsets[path] = end
+                            self.stalled.pop(path, None)
+                            self.rejected += 1
+                    elif b"\n" in chunk:
+                        self.stalled[path] = offset
+                    continue
+
+            self.stalled.pop(path, None)
+            self.offsets[path] = offset + len(data)
+            # Records were written at the latest by the last modification
+            arrived = min(os.path.getmtime(path), time.time())
+
+            text = data.decode("utf-8", errors="replace")
+            if ext == ".csv" and path not in self.headers:
+                header, _, text = text.partition("\n")
+                self.headers[path] = header.rstrip("\r")
+            if not text.strip():
+                continue
+
+            try:
+                if ext == ".csv":
+                    frame = pd.read_csv(io.StringIO(self.headers[path] + "\n" + text))
+                else:
+                    frame = pd.read_json(io.StringIO(text), lines=True)
+            except ValueError:
+                # pandas parser errors are ValueErrors: skip the whole read
+                self.rejected += text.count("\n")
+                continue
+
+            frame[ARRIVED] = arrived
+            frames.append(frame)
+        return frames
+
+
+class SocketSource:
+    """Accept newline-delimited JSON tweets on a local TCP port."""
+
+    def __init__(self, port, host="127.0.0.1", max_pending=100_000, max_batch=50_000):
+        # Bounded queue: senders block when the scorer falls behind
+        self.lines = queue.Queue(maxsize=max_pending)
+        self.max_batch = max_batch
+        self.rejected = 0
+        lines = self.lines
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if line.strip():
+                        lines.put((line, time.time()))
+
+        self.server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def poll(self):
+        received = []
+        while len(received) < self.max_batch:
+            try:
+                received.append(self.lines.get_nowait())
+            except queue.Empty:
+                break
+        if not received:
+            return []
+
+        records, arrived = [], []
+        for line, when in received:
+            try:
+                record = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                record = None
+            if not isinstance(record, dict):
+                self.rejected += 1
+                continue
+            records.append(record)
+            arrived.append(when)
+
+        if not records:
+            return []
+        frame = pd.DataFrame.from_records(records)
+        frame[ARRIVED] = arrived
+        return [frame]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ==============================
+# 2. PLAYER MATCHING
+# ==============================
+
+def match_players(clean_texts, players, max_words):
+    """Return (row, player_name) pairs for every player named in a tweet.
+
+    `players` is a set of cleaned player names. Word n-grams of up to
+    `max_words` words are built with whole-column operations and looked up
+    in the set, instead of running one regex per name.
+    """
+    words = clean_texts.str.split().explode().dropna()
+    rows = words.index.to_numpy()
+    words = words.reset_index(drop=True)
+    row_ids = pd.Series(rows)
+
+    hits = []
+    gram = words
+    for n in range(1, max_words + 1):
+        if n > 1:
+            gram = gram + " " + words.shift(-(n - 1))
+            # All words of the n-gram must come from the same tweet
+            candidates = gram[row_ids.shift(-(n - 1)).eq(row_ids)]
+        else:
+            candidates = gram
+        found = candidates[candidates.isin(players)]
+        hits.append(pd.DataFrame({"row": rows[found.index], "player_name": found.to_numpy()}))
+
+    return pd.concat(hits, ignore_index=True).drop_duplicates()
+
+
+# ==============================
+# 3. ROLLING WINDOWS
+# ==============================
+
+class SentimentWindows:
+    """Per-player daily buckets for the last `window_days` days."""
+
+    COLUMNS = ["tweet_count", "compound_sum", "positive_mentions", "negative_mentions"]
+
+    def __init__(self, window_days=WINDOW_DAYS):
+        self.window_days = window_days
+        self.buckets = pd.DataFrame(
+            columns=self.COLUMNS,
+            index=pd.MultiIndex.from_arrays([[], []], names=["player_name", "day"]),
+            dtype="float64",
+        )
+        self.latest_day = None
+        self.late_tweets = 0
+
+    def update(self, mentions):
+        # mentions: one row per (tweet, player) with player_name, day,
+        # compound_score and sentiment
+        if mentions.empty:
+            return
+
+        batch_latest = mentions["day"].max()
+        if self.latest_day is None or batch_latest > self.latest_day:
+            self.latest_day = batch_latest
+        cutoff = self.latest_day - pd.Timedelta(days=self.window_days - 1)
+
+        on_time = mentions["day"] >= cutoff
+        self.late_tweets += int((~on_time).sum())
+        mentions = mentions[on_time]
+
+        batch = mentions.assign(
+            positive=mentions["sentiment"].eq("Positive"),
+            negative=mentions["sentiment"].eq("Negative"),
+        ).groupby(["player_name", "day"]).agg(
+            tweet_count=("compound_score", "size"),
+            compound_sum=("compound_score", "sum"),
+            positive_mentions=("positive", "sum"),
+            negative_mentions=("negative", "sum"),
+        ).astype("float64")
+
+        buckets = self.buckets.add(batch, fill_value=0) if len(self.buckets) else batch
+        self.buckets = buckets[buckets.index.get_level_values("day") >= cutoff]
+
+    def snapshot(self, days):
+        if self.latest_day is None:
+            return pd.DataFrame(columns=["player_name", "sentiment_score", "positive_mentions",
+                                         "negative_mentions", "tweet_count", "window_start",
+                                         "window_end"])
+
+        start = self.latest_day - pd.Timedelta(days=days - 1)
+        window = self.buckets[self.buckets.index.get_level_values("day") >= start]
+        totals = window.groupby(level="player_name").sum()
+
+        return pd.DataFrame({
+            "player_name": totals.index,
+            "sentiment_score": (totals["compound_sum"] / totals["tweet_count"]).to_numpy(),
+            "positive_mentions": totals["positive_mentions"].astype("int64").to_numpy(),
+            "negative_mentions": totals["negative_mentions"].astype("int64").to_numpy(),
+            "tweet_count": totals["tweet_count"].astype("int64").to_numpy(),
+            "window_start": start.date(),
+            "window_end": self.latest_day.date(),
+        })
+
+
+# ==============================
+# 4. PUBLISH
+# ==============================
+
+def publish(df, path):
+    # Write then rename, so readers never see a half-written file
+    tmp_path = path + ".tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+# ==============================
+# 5. STREAM LOOP
+# ==============================
+
+def run_stream(source, score, players, out_dir, interval=1.0, duration=None):
+    """Score tweets from `source` in micro-batches until `duration` seconds pass.
+
+    `score(df)` must add `clean_text`, `compound_score` and `sentiment`
+    columns. `players` maps player names cleaned the same way as tweets to
+    the player_name published for merger.py.
+    Publishes sentiment_daily.csv and sentiment_weekly.csv to `out_dir`.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    daily_path = os.path.join(out_dir, "sentiment_daily.csv")
+    weekly_path = os.path.join(out_dir, "sentiment_weekly.csv")
+
+    names = set(players)
+    max_words = max((len(name.split()) for name in names), default=1)
+    windows = SentimentWindows()
+
+    started = time.time()
+    batches = 0
+    rejected = 0
+    while duration is None or time.time() - started < duration:
+        poll_started = time.time()
+
+        frames = []
+        for frame in source.poll():
+            if "text" in frame.columns and "created_at" in frame.columns:
+                frames.append(frame)
+            else:
+                rejected += len(frame)
+        if not frames:
+            time.sleep(interval)
+            continue
+        tweets = pd.concat(frames, ignore_index=True)
+
+        if INGESTED in tweets.columns:
+            ingested = _parse_times(tweets[INGESTED])
+            ingested = (ingested - pd.Timestamp(0, tz="UTC")).dt.total_seconds()
+            tweets[ARRIVED] = ingested.fillna(tweets[ARRIVED])
+        arrived = pd.to_datetime(tweets[ARRIVED], unit="s", utc=True)
+
+        # Event time comes from the tweet only; a tweet cannot have been
+        # created after it arrived
+        event_time = _parse_times(tweets["created_at"])
+        has_text = tweets["text"].notna() & tweets["text"].astype(str).str.strip().ne("")
+        usable = (has_text & event_time.notna() & (event_time <= arrived + MAX_CLOCK_SKEW)).to_numpy()
+        rejected += int((~usable).sum())
+        tweets = tweets[usable].reset_index(drop=True)
+        event_time = event_time[usable].reset_index(drop=True)
+        arrived = arrived[usable].reset_index(drop=True)
+        event_time = event_time.where(event_time <= arrived, arrived)
+        if tweets.empty:
+            time.sleep(interval)
+            continue
+
+        scoring_started = time.time()
+        tweets = score(tweets)
+        scoring_seconds = time.time() - scoring_started
+
+        hits = match_players(tweets["clean_text"], names, max_words)
+        rows = hits["row"].to_numpy()
+        mentions = pd.DataFrame({
+            "player_name": hits["player_name"].map(players).to_numpy(),
+            "day": event_time.dt.floor("D").iloc[rows].to_numpy(),
+            "compound_score": tweets["compound_score"].iloc[rows].to_numpy(),
+            "sentiment": tweets["sentiment"].iloc[rows].to_numpy(),
+        })
+        mentions["day"] = pd.to_datetime(mentions["day"], utc=True)
+        windows.update(mentions)
+
+        publish(windows.snapshot(1), daily_path)
+        publish(windows.snapshot(WINDOW_DAYS), weekly_path)
+
+        # End-to-end latency: arrival at the source -> aggregates published
+        published = time.time()
+        latency_ms = (published - tweets[ARRIVED].to_numpy()) * 1000
+        batches += 1
+        print(
+            f"[stream] batch {batches}: {len(tweets)} tweets, "
+            f"{len(tweets) / max(published - poll_started, 1e-9):.0f} tweets/s "
+            f"(scoring {len(tweets) / max(scoring_seconds, 1e-9):.0f} tweets/s), "
+            f"{len(mentions)} player mentions, "
+            f"latency p50 {np.percentile(latency_ms, 50):.0f} ms / "
+            f"p95 {np.percentile(latency_ms, 95):.0f} ms, "
+            f"late {windows.late_tweets}, rejected {rejected + source.rejected}"
+        )
+
+        time.sleep(max(0.0, interval - (time.time() - poll_started)))
@@ -1,86 +1,159 @@
 
+import argparse
+
+import numpy as np
 import pandas as pd
 import nltk
-import re
 import matplotlib.pyplot as plt
 import seaborn as sns
 
 from nltk.sentiment import SentimentIntensityAnalyzer
 
-# Download VADER lexicon (run once)
-nltk.download('vader_lexicon')
+from validation import validate
+
+FILE_PATH = "Football player analyzer AI\\Twitter dataset\\2020-07-09 till 2020-09-19.csv"  # change if needed
 
 # ===============================
-# 1. LOAD DATASET
+# 1. TEXT CLEANING FUNCTION
 # ===============================
 
-file_path = "Football player analyzer AI\\Twitter dataset\\2020-07-09 till 2020-09-19.csv"  # change if needed
-df = pd.read_csv(file_path)
-
-print("Dataset Loaded Successfully")
-print(df.head())
-print("\nColumns in dataset:", df.columns)
+def clean_texts(texts):
+    return (
+        texts.map(str)
+        .str.replace(r"http\S+", "", regex=True)        # remove URLs
+        .str.replace(r"@\w+", "", regex=True)           # remove mentions
+        .str.replace("#", "", regex=False)              # remove hashtag symbol
+        .str.replace(r"[^A-Za-z\s]", "", regex=True)    # remove special characters
+        .str.lower()
+    )
 
 # ===============================
-# 2. TEXT CLEANING FUNCTION
+# 2. APPLY VADER SENTIMENT
 # ===============================
 
-def clean_text(text):
-    text = str(text)
-    text = re.sub(r"http\S+", "", text)  # remove URLs
-    text = re.sub(r"@\w+", "", text)     # remove mentions
-    text = re.sub(r"#", "", text)        # remove hashtag symbol
-    text = re.sub(r"[^A-Za-z\s]", "", text)  # remove special characters
-    text = text.lower()
-    return text
+sia = None
 
-# Change 'text' to your actual tweet column name if different
-df['clean_text'] = df['text'].apply(clean_text)
+def get_sentiment_scores(text):
+    global sia
+    if sia is None:
+        sia = SentimentIntensityAnalyzer()
+    return sia.polarity_scores(text)
 
 # ===============================
-# 3. APPLY VADER SENTIMENT
+# 3. CLASSIFY SENTIMENT
 # ===============================
 
-sia = SentimentIntensityAnalyzer()
+def classify_sentiment(scores):
+    return np.select(
+        [scores >= 0.05, scores <= -0.05],
+        ["Positive", "Negative"],
+        default="Neutral",
+    )
 
-def get_sentiment_scores(text):
-    return sia.polarity_scores(text)
 
-df['sentiment_scores'] = df['clean_text'].apply(get_sentiment_scores)
+def score_tweets(df):
+    # Shared by batch and streaming mode
+
+    # Change 'text' to your actual tweet column name if different
+    df['clean_text'] = clean_texts(df['text'])
+
+    df['sentiment_scores'] = [get_sentiment_scores(text) for text in df['clean_text']]
+
+    # Extract compound score
+    df['compound_score'] = [scores['compound'] for scores in df['sentiment_scores']]
 
-# Extract compound score
-df['compound_score'] = df['sentiment_scores'].apply(lambda x: x['compound'])
+    df['sentiment'] = classify_sentiment(df['compound_score'])
+    return df
 
 # ===============================
-# 4. CLASSIFY SENTIMENT
+# 4. BATCH MODE
 # ===============================
 
-def classify_sentiment(score):
-    if score >= 0.05:
-        return "Positive"
-    elif score <= -0.05:
-        return "Negative"
-    else:
-        return "Neutral"
+def run_batch(file_path):
+    df = pd.read_csv(file_path)
+
+    print("Dataset Loaded Successfully")
+    print(df.head())
+    print("\nColumns in dataset:", df.columns)
+
+    df = score_tweets(df)
+
+    print("\nSentiment Distribution:")
+    print(df['sentiment'].value_counts())
+
+    # Visualization
+    plt.figure()
+    sns.countplot(x='sentiment', data=df)
+    plt.title("Sentiment Distribution using VADER")
+    plt.show()
 
-df['sentiment'] = df['compound_score'].apply(classify_sentiment)
+    # Save processed data
+    df, report = validate(
+        df,
+        "twitter",
+        quarantine_path="sentiment_quarantine.csv",
+    )
 
-print("\nSentiment Distribution:")
-print(df['sentiment'].value_counts())
+    df.to_csv("sentiment.csv", index=False)
+
+    print("\nProcessed file saved as 'tweets_with_vader_sentiment.csv'")
 
 # ===============================
-# 5. VISUALIZATION
+# 5. STREAMING MODE
 # ===============================
 
-plt.figure()
-sns.countplot(x='sentiment', data=df)
-plt.title("Sentiment Distribution using VADER")
-plt.show()
+def load_player_names(path):
+    # Any CSV with a 'player_name' or 'name' column (e.g. market_values.csv).
+    # Returns {cleaned name: player_name}: tweets are matched on the cleaned
+    # form, aggregates are published under the name as merger.py
+    # standardizes it (lowercase, stripped), so accents and hyphens survive.
+    players = pd.read_csv(path)
+    column = "player_name" if "player_name" in players.columns else "name"
+    names = players[column].dropna()
+    cleaned = clean_texts(names).str.split().str.join(" ")
+    keys = pd.Series(names.str.lower().str.strip().to_numpy(), index=cleaned.to_numpy())
+    keys = keys[(keys.index != "") & ~keys.index.duplicated()]
+    return keys.to_dict()
+
+
+def run_streaming(args):
+    from tweet_stream import DirectorySource, SocketSource, run_stream
+
+    if args.stream_dir is not None:
+        source = DirectorySource(args.stream_dir)
+    else:
+        source = SocketSource(args.stream_port)
+
+    print("Streaming tweets, publishing aggregates to:", args.out_dir)
+    run_stream(
+        source,
+        score_tweets,
+        load_player_names(args.players),
+        args.out_dir,
+        interval=args.interval,
+        duration=args.duration,
+    )
 
 # ===============================
-# 6. SAVE PROCESSED DATA
+# 6. RUN
 # ===============================
 
-df.to_csv("sentiment.csv", index=False)
-
-print("\nProcessed file saved as 'tweets_with_vader_sentiment.csv'")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score tweet sentiment with VADER")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--stream-dir", help="tail .csv/.jsonl/.ndjson tweet files in this directory")
+    source.add_argument("--stream-port", type=int, help="read newline-delimited JSON tweets on this local port")
+    parser.add_argument("--players", default="market_values.csv",
+                        help="CSV with player names to match in tweets (streaming only)")
+    parser.add_argument("--out-dir", default=".", help="where sentiment_daily.csv / sentiment_weekly.csv go")
+    parser.add_argument("--interval", type=float, default=1.0, help="micro-batch interval in seconds")
+    parser.add_argument("--duration", type=float, default=None, help="stop streaming after this many seconds")
+    args = parser.parse_args()
+
+    # Download VADER lexicon (run once)
+    nltk.download('vader_lexicon')
+
+    if args.stream_dir is not None or args.stream_port is not None:
+        run_streaming(args)
+    else:
+        run_batch(FILE_PATH)
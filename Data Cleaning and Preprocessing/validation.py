@@ -0,0 +1,378 @@
+import numpy as np
+import pandas as pd
+
+# ==============================
+# DATA-QUALITY VALIDATION STAGE
+# ==============================
+#
+# Every pipeline script can call validate() on its output:
+#
+#     from validation import validate
+#     data, report = validate(data, "transfermarkt", quarantine_path="market_values_quarantine.csv")
+#
+# All checks are whole-column (vectorized) operations, so the cost is a
+# handful of passes over the frame regardless of row count.
+#
+# Rule set keys (all optional):
+#   required      - columns that must exist
+#   numeric       - columns that must have a numeric dtype (also checked for +/-inf)
+#   not_null      - row-level: a null in these columns quarantines the row
+#   ranges        - row-level: {column: (low, high)}, None means unbounded
+#   allowed       - row-level: {column: [allowed values]}
+#   max_null_rate - dataset-level: {column: highest accepted share of nulls}
+#   key           - row-level: the first row of a key is kept, extra copies
+#                   are quarantined
+#   min_coverage  - dataset-level: {join name: lowest accepted match share}
+#   max_quarantine_rate - dataset-level: highest accepted share of quarantined
+#                   rows. Without it quarantined rows are reported but do not
+#                   fail the report (filtering them is the normal job of a
+#                   validate() call).
+
+
+# ==============================
+# 1. PER-SOURCE RULE SETS
+# ==============================
+
+RULES = {
+    # StatsBomb.py -> statsbomb.csv
+    "statsbomb": {
+        "required": ["player_name", "season", "matches_played", "goals", "assists",
+                     "shots", "xg", "passes", "pass_completed", "tackles",
+                     "interceptions", "dribbles_completed", "minutes_played",
+                     "pass_accuracy"],
+        "numeric": ["matches_played", "goals", "assists", "shots", "xg", "passes",
+                    "pass_completed", "tackles", "interceptions",
+                    "dribbles_completed", "minutes_played", "pass_accuracy"],
+        "not_null": ["player_name", "season"],
+        "ranges": {
+            "matches_played": (0, None),
+            "goals": (0, None),
+            "assists": (0, None),
+            "shots": (0, None),
+            "xg": (0, None),
+            "passes": (0, None),
+            "pass_completed": (0, None),
+            # Max event minute: extra time plus stoppage can pass 130
+            "minutes_played": (0, 150),
+            "pass_accuracy": (0, 1),
+        },
+        "key": ["player_name", "season"],
+        "min_coverage": {"events_with_season": 0.95},
+    },
+
+    # transfermrkt.py -> market_values.csv
+    "transfermarkt": {
+        "required": ["player_id", "season", "minutes_played", "goals", "assists",
+                     "yellow_cards", "red_cards", "market_value_in_eur", "name",
+                     "date_of_birth", "position", "age", "transfer_fee"],
+        "numeric": ["player_id", "season", "minutes_played", "goals", "assists",
+                    "yellow_cards", "red_cards", "market_value_in_eur", "age",
+                    "transfer_fee"],
+        "not_null": ["player_id", "season", "market_value_in_eur", "age"],
+        "ranges": {
+            "age": (15, 45),
+            "minutes_played": (0, None),
+            "goals": (0, None),
+            "assists": (0, None),
+            "market_value_in_eur": (0, None),
+            "transfer_fee": (0, None),
+        },
+        "max_null_rate": {"position": 0.05},
+        "key": ["player_id", "season"],
+    },
+
+    # injury.py -> injuries.csv
+    "injury": {
+        "required": ["p_id2", "start_year", "age", "bmi", "season_days_injured",
+                     "cumulative_days_injured", "injury_risk_score"],
+        "numeric": ["start_year", "age", "bmi", "season_days_injured",
+                    "season_days_injured_prev_season", "cumulative_days_injured",
+                    "injury_days_per_game", "injury_trend", "injury_risk_score"],
+        "not_null": ["p_id2", "start_year"],
+        "ranges": {
+            # injury.py fills missing values with 0
+            "age": (0, 45),
+            "bmi": (0, 60),
+            "season_days_injured": (0, None),
+            "cumulative_days_injured": (0, None),
+            "injury_risk_score": (0, 1),
+        },
+        "allowed": {"severe_season_injury": [0, 1]},
+        # No key: repeated (p_id2, start_year) rows are distinct records
+    },
+
+    # twitter.py -> sentiment.csv
+    "twitter": {
+        "required": ["text", "clean_text", "compound_score", "sentiment"],
+        "numeric": ["compound_score"],
+        "not_null": ["compound_score"],
+        "ranges": {"compound_score": (-1, 1)},
+        "allowed": {"sentiment": ["Positive", "Negative", "Neutral"]},
+        "max_null_rate": {"text": 0.01},
+    },
+
+    # merger.py -> final_merged_dataset.csv
+    "merged": {
+        "required": ["player_name", "age", "market_value_eur", "total_days_injured",
+                     "sentiment_score", "log_market_value"],
+        "numeric": ["age", "market_value_eur", "total_days_injured",
+                    "season_days_injured", "injury_count", "sentiment_score",
+                    "injury_risk", "log_market_value"],
+        "not_null": ["player_name"],
+        "ranges": {
+            "age": (15, 45),
+            "market_value_eur": (0, None),
+            "total_days_injured": (0, None),
+            "sentiment_score": (-1, 1),
+        },
+        "max_null_rate": {"market_value_eur": 0.5},
+        # No key: one row per performance record, player names repeat
+        "min_coverage": {"market_values": 0.5},
+    },
+
+    # feature_engg.py input (merged longitudinal dataset)
+    "merged_longitudinal": {
+        "required": ["player_id", "player_name", "season_year", "age", "position",
+                     "market_value_eur", "goals_total", "assists_total",
+                     "minutes_played_season", "sb_tackles", "sb_interceptions",
+                     "season_days_injured", "fan_sentiment", "media_sentiment"],
+        "numeric": ["player_id", "season_year", "age", "market_value_eur",
+                    "goals_total", "assists_total", "minutes_played_season",
+                    "sb_tackles", "sb_interceptions", "season_days_injured",
+                    "fan_sentiment", "media_sentiment"],
+        "not_null": ["player_id", "season_year"],
+        "ranges": {
+            "age": (15, 45),
+            "market_value_eur": (0, None),
+            "minutes_played_season": (0, None),
+            "season_days_injured": (0, None),
+            "fan_sentiment": (-1, 1),
+            "media_sentiment": (-1, 1),
+        },
+        "key": ["player_id", "season_year"],
+    },
+
+    # feature_engg.py output (final modeling features)
+    "features": {
+        "required": ["player_name", "season_year", "market_value_eur",
+                     "goal_involvement_per_90", "defensive_actions_per_90",
+                     "availability_index", "overall_sentiment"],
+        "numeric": ["season_year", "age", "market_value_eur",
+                    "market_value_yoy_change", "market_value_yoy_pct_change",
+                    "minutes_played_season", "goal_involvement_per_90",
+                    "defensive_actions_per_90", "sb_pass_accuracy",
+                    "season_days_injured", "injury_risk_score",
+                    "availability_index", "fan_sentiment", "media_sentiment",
+                    "overall_sentiment", "sentiment_yoy_change"],
+        "not_null": ["player_name", "season_year", "market_value_eur"],
+        "ranges": {
+            "market_value_yoy_pct_change": (-1, 5),
+            "goal_involvement_per_90": (0, None),
+            "defensive_actions_per_90": (0, None),
+            "availability_index": (0, 1),
+            "overall_sentiment": (-1, 1),
+        },
+        "key": ["player_name", "season_year"],
+    },
+}
+
+
+# ==============================
+# 2. CROSS-SOURCE JOIN COVERAGE
+# ==============================
+
+def join_coverage(left, right, on):
+    # (matched, total): left rows whose key is present in right, and all
+    # left rows. Counts rather than a share, so partitions can be summed.
+    on = [on] if isinstance(on, str) else list(on)
+    if len(left) == 0:
+        return 0, 0
+    left_keys = pd.MultiIndex.from_frame(left[on])
+    right_keys = pd.MultiIndex.from_frame(right[on].drop_duplicates())
+    return int(left_keys.isin(right_keys).sum()), len(left)
+
+
+def _share(matched, total):
+    return matched / total if total else 1.0
+
+
+# ==============================
+# 3. VALIDATE A FRAME
+# ==============================
+
+def validate(df, source, quarantine_path=None, coverage=None, strict=False,
+             print_report=True):
+    """Run the rule set for `source` on df.
+
+    Returns (valid_rows, report). Rows failing a row-level check are left
+    out of valid_rows and, when quarantine_path is given, written there with
+    a `_violations` column. With strict=True a failed report raises ValueError.
+    """
+    rules = RULES[source]
+    report = {
+        "source": source,
+        "rows": len(df),
+        "schema": [],
+        "null_rates": {},
+        "row_failures": {},
+        "coverage": {},
+        "quarantined": 0,
+    }
+
+    # --- Schema ---
+    for col in rules.get("required", []):
+        if col not in df.columns:
+            report["schema"].append(f"missing column '{col}'")
+
+    numeric_cols = []
+    for col in rules.get("numeric", []):
+        if col not in df.columns:
+            continue
+        if pd.api.types.is_numeric_dtype(df[col]):
+            numeric_cols.append(col)
+        else:
+            report["schema"].append(f"'{col}' is {df[col].dtype}, expected numeric")
+
+    # --- Row-level checks (one boolean mask per check) ---
+    failures = {}
+
+    for col in rules.get("not_null", []):
+        if col in df.columns:
+            failures[f"null:{col}"] = df[col].isna().to_numpy()
+
+    for col in numeric_cols:
+        values = df[col].to_numpy(dtype="float64", na_value=np.nan)
+        failures[f"inf:{col}"] = np.isinf(values)
+
+    for col, (low, high) in rules.get("ranges", {}).items():
+        if col not in numeric_cols:
+            continue
+        mask = np.zeros(len(df), dtype=bool)
+        if low is not None:
+            mask |= df[col].lt(low).to_numpy()
+        if high is not None:
+            mask |= df[col].gt(high).to_numpy()
+        failures[f"range:{col}"] = mask
+
+    for col, values in rules.get("allowed", {}).items():
+        if col in df.columns:
+            failures[f"allowed:{col}"] = (df[col].notna() & ~df[col].isin(values)).to_numpy()
+
+    key = rules.get("key")
+    if key and all(col in df.columns for col in key):
+        failures["duplicate_key"] = df.duplicated(subset=key, keep="first").to_numpy()
+
+    bad = np.zeros(len(df), dtype=bool)
+    for name, mask in failures.items():
+        count = int(mask.sum())
+        if count:
+            report["row_failures"][name] = count
+            bad |= mask
+    report["quarantined"] = int(bad.sum())
+
+    # --- Dataset-level checks ---
+    null_limits = {
+        col: limit for col, limit in rules.get("max_null_rate", {}).items()
+        if col in df.columns
+    }
+    if null_limits and len(df):
+        rates = df[list(null_limits)].isna().mean()
+        for col, limit in null_limits.items():
+            report["null_rates"][col] = (float(rates[col]), limit)
+
+    min_coverage = rules.get("min_coverage", {})
+    for name, (matched, total) in (coverage or {}).items():
+        report["coverage"][name] = (matched, total, min_coverage.get(name))
+
+    report["passed"] = _passed(report)
+
+    # --- Quarantine file ---
+    if quarantine_path is not None:
+        quarantined = df[bad].copy()
+        reasons = pd.Series("", index=quarantined.index)
+        for name in report["row_failures"]:
+            hit = failures[name][bad]
+            reasons[hit] = reasons[hit] + name + ";"
+        quarantined["_violations"] = reasons.str.rstrip(";")
+        quarantined.to_csv(quarantine_path, index=False)
+
+    if print_report:
+        print(format_report(report))
+
+    if strict and not report["passed"]:
+        raise ValueError(f"Validation failed for '{source}'")
+
+    return df[~bad], report
+
+
+# ==============================
+# 4. COMBINE PARTITION REPORTS
+# ==============================
+
+def combine_reports(reports):
+    # Merge the per-partition reports of an out-of-core run into one.
+    # Null rates are weighted by partition row counts, coverage counts are
+    # summed.
+    reports = list(reports)
+    rows = sum(r["rows"] for r in reports)
+    combined = {
+        "source": reports[0]["source"],
+        "rows": rows,
+        "schema": sorted({issue for r in reports for issue in r["schema"]}),
+        "null_rates": {},
+        "row_failures": {},
+        "coverage": {},
+        "quarantined": sum(r["quarantined"] for r in reports),
+    }
+
+    for r in reports:
+        for name, count in r["row_failures"].items():
+            combined["row_failures"][name] = combined["row_failures"].get(name, 0) + count
+
+    for r in reports:
+        for col, (rate, limit) in r["null_rates"].items():
+            total, _ = combined["null_rates"].get(col, (0.0, limit))
+            combined["null_rates"][col] = (total + rate * r["rows"] / max(rows, 1), limit)
+
+        for name, (matched, total, limit) in r["coverage"].items():
+            seen_matched, seen_total, _ = combined["coverage"].get(name, (0, 0, limit))
+            combined["coverage"][name] = (seen_matched + matched, seen_total + total, limit)
+
+    combined["passed"] = _passed(combined)
+    return combined
+
+
+def _passed(report):
+    max_quarantine_rate = RULES[report["source"]].get("max_quarantine_rate")
+    return not (
+        report["schema"]
+        or any(rate > limit for rate, limit in report["null_rates"].values())
+        or (max_quarantine_rate is not None
+            and _share(report["quarantined"], report["rows"]) > max_quarantine_rate)
+        or any(limit is not None and _share(matched, total) < limit
+               for matched, total, limit in report["coverage"].values())
+    )
+
+
+# ==============================
+# 5. COMPACT REPORT
+# ==============================
+
+def format_report(report):
+    status = "OK" if report["passed"] else "FAILED"
+    lines = [
+        f"[validation] {report['source']}: {report['rows']} rows, "
+        f"{report['quarantined']} quarantined -> {status}"
+    ]
+    for issue in report["schema"]:
+        lines.append(f"  schema: {issue}")
+    for col, (rate, limit) in report["null_rates"].items():
+        if rate > limit:
+            lines.append(f"  null rate: {col} {rate:.1%} > {limit:.1%}")
+    if report["row_failures"]:
+        counts = ", ".join(f"{name}={count}" for name, count in report["row_failures"].items())
+        lines.append(f"  rows: {counts}")
+    for name, (matched, total, limit) in report["coverage"].items():
+        floor = "" if limit is None else f" (min {limit:.1%})"
+        lines.append(f"  coverage: {name} {_share(matched, total):.1%} ({matched}/{total}){floor}")
+    return "\n".join(lines)